@@ -1,11 +1,33 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+# Motor and PyMongo are imported on first use, the connection is opened lazily
 from bson import ObjectId
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+from collections import OrderedDict
 from datetime import datetime
+import asyncio
+import hashlib
+import json
 import logging
 from fastapi import HTTPException, status
 
+# Exercise fields that plan search can filter on and report facet counts for
+PLAN_SEARCH_FACETS = ("muscle_groups", "equipment", "difficulty")
+# Maximum number of values returned per facet
+PLAN_SEARCH_FACET_LIMIT = 50
+
+# Sort order of exports, matching the (user_id, updated_at, _id) index
+EXPORT_SORT = [("updated_at", 1), ("_id", 1)]
+
+def _modified_since_query(user_id: str, updated_since: Optional[datetime]) -> Dict[str, Any]:
+    """Build a query for a user's documents created or updated at or after updated_since.
+
+    updated_at is set on insert as well as on update, so one indexed field covers both.
+    """
+    query: Dict[str, Any] = {"user_id": user_id}
+    if updated_since is not None:
+        query["updated_at"] = {"$gte": updated_since}
+    return query
+
 # MongoDB Configuration
 class MongoDBConfig:
     """Configuration for MongoDB connection."""
@@ -19,6 +41,8 @@ class MongoDBConfig:
         
     async def connect(self):
         """Connect to MongoDB."""
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from pymongo import ASCENDING, DESCENDING, TEXT
         try:
             self.client = AsyncIOMotorClient(self.mongodb_url)
             self.db = self.client[self.db_name]
@@ -26,12 +50,28 @@ class MongoDBConfig:
             
             # Initialize collections
             self.workout_plans = self.db.workout_plans
+            self.exercises = self.db.exercises
             self.users = self.db.users
             self.daily_schedules = self.db.daily_schedules
+            self.training_aggregates = self.db.training_aggregates
             
             # Create indexes
-            await self.db.workout_plans.create_index("user_id")
+            await self.db.workout_plans.create_index([("user_id", ASCENDING), ("created_at", DESCENDING)])
+            # Multikey indexes backing faceted plan search
+            for field in PLAN_SEARCH_FACETS:
+                await self.db.workout_plans.create_index(
+                    [("user_id", ASCENDING), (f"workout_days.exercises.{field}", ASCENDING)]
+                )
+            await self.db.workout_plans.create_index(
+                [("user_id", ASCENDING), ("title", TEXT), ("description", TEXT)],
+                name="user_plan_text"
+            )
             await self.db.daily_schedules.create_index("user_id")
+            # Exports filter and sort on the last modification time
+            for collection in (self.db.workout_plans, self.db.daily_schedules):
+                await collection.create_index(
+                    [("user_id", ASCENDING), ("updated_at", ASCENDING), ("_id", ASCENDING)]
+                )
             
             return self.db
         except Exception as e:
@@ -61,11 +101,104 @@ class PyObjectId(ObjectId):
     def __modify_schema__(cls, field_schema):
         field_schema.update(type="string")
 
+# Exercise normalization
+# Fields describing the movement itself; these are shared by every plan using the exercise
+EXERCISE_CONTENT_FIELDS = (
+    "name", "description", "equipment", "muscle_groups",
+    "difficulty", "instructions", "alternatives",
+)
+# Fields kept inline in a plan: the per-plan prescription plus short fields used for filtering
+EXERCISE_REFERENCE_FIELDS = (
+    "name", "sets", "reps", "rest_time",
+    "equipment", "muscle_groups", "difficulty",
+)
+
+def exercise_content_hash(exercise: dict) -> str:
+    """Return a stable content hash for the shared part of an exercise."""
+    content = {field: exercise.get(field) for field in EXERCISE_CONTENT_FIELDS}
+    payload = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ExerciseCache:
+    """LRU cache of shared exercise documents keyed by content hash.
+
+    Exercise documents are content-addressed and never change once written,
+    so cached entries never need invalidation.
+    """
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, exercise_id: str) -> Optional[dict]:
+        exercise = self._entries.get(exercise_id)
+        if exercise is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(exercise_id)
+        self.hits += 1
+        return exercise
+
+    def put(self, exercise_id: str, exercise: dict):
+        self._entries[exercise_id] = exercise
+        self._entries.move_to_end(exercise_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __contains__(self, exercise_id: str) -> bool:
+        return exercise_id in self._entries
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+# Training aggregates
+# Top-level counters of a training aggregates document
+AGGREGATE_COUNTERS = ("plan_count", "total_workout_days", "total_exercises", "total_sets")
+# Per-name breakdowns of a training aggregates document
+AGGREGATE_GROUPS = ("muscle_groups", "equipment", "difficulty")
+# Plan fields needed to compute a plan's contribution to its owner's aggregates
+AGGREGATE_PLAN_PROJECTION = {"user_id": 1, "workout_days": 1}
+
+def _aggregate_key(value) -> str:
+    """Normalize a muscle group, equipment or difficulty name for use as a document key."""
+    key = str(value).strip().lower().replace(".", "_").replace("$", "_")
+    return key or "unspecified"
+
+def training_contribution(plan: Optional[dict]) -> Dict[str, int]:
+    """Return the counters a single plan adds to its owner's training aggregates."""
+    counters: Dict[str, int] = {}
+    if not plan:
+        return counters
+
+    def add(key: str, amount: int):
+        counters[key] = counters.get(key, 0) + amount
+
+    add("plan_count", 1)
+    for day in plan.get("workout_days") or []:
+        add("total_workout_days", 1)
+        for exercise in day.get("exercises") or []:
+            try:
+                sets = int(exercise.get("sets") or 0)
+            except (TypeError, ValueError):
+                sets = 0
+            add("total_exercises", 1)
+            add("total_sets", sets)
+            # Names that normalize to the same key count once per exercise
+            for muscle_group in {_aggregate_key(value) for value in exercise.get("muscle_groups") or []}:
+                add(f"muscle_groups.{muscle_group}", sets)
+            for equipment in {_aggregate_key(value) for value in exercise.get("equipment") or []}:
+                add(f"equipment.{equipment}", 1)
+            if exercise.get("difficulty"):
+                add(f"difficulty.{_aggregate_key(exercise['difficulty'])}", 1)
+    return counters
+
 # MongoDB Controllers
 class MongoDBController:
     """Controller for MongoDB operations."""
-    def __init__(self, db):
+    def __init__(self, db, exercise_cache_size: int = 1024):
         self.db = db
+        self.exercise_cache = ExerciseCache(exercise_cache_size)
         
     # User Operations
     async def create_user(self, user_data: dict):
@@ -101,11 +234,191 @@ class MongoDBController:
         )
         return result.modified_count > 0
     
+    # Exercise Operations
+    def _normalize_workout_days(self, workout_days: List[dict]):
+        """Split embedded exercises into compact references and shared exercise documents."""
+        exercises = {}
+        normalized_days = []
+        for day in workout_days or []:
+            refs = []
+            for exercise in day.get("exercises") or []:
+                if "exercise_id" in exercise:
+                    refs.append(exercise)
+                    continue
+                exercise_id = exercise_content_hash(exercise)
+                exercises[exercise_id] = {field: exercise.get(field) for field in EXERCISE_CONTENT_FIELDS}
+                ref = {field: exercise.get(field) for field in EXERCISE_REFERENCE_FIELDS}
+                ref["exercise_id"] = exercise_id
+                refs.append(ref)
+            normalized_days.append({**day, "exercises": refs})
+        return normalized_days, exercises
+
+    async def _store_exercises(self, exercises: Dict[str, dict]):
+        """Insert shared exercise documents that are not stored yet."""
+        new_ids = [exercise_id for exercise_id in exercises if exercise_id not in self.exercise_cache]
+        if not new_ids:
+            return
+        from pymongo import UpdateOne
+        await self.db.exercises.bulk_write(
+            [
+                UpdateOne({"_id": exercise_id}, {"$setOnInsert": exercises[exercise_id]}, upsert=True)
+                for exercise_id in new_ids
+            ],
+            ordered=False,
+        )
+        for exercise_id in new_ids:
+            self.exercise_cache.put(exercise_id, exercises[exercise_id])
+
+    async def _hydrate_workout_plans(self, plans: List[dict]):
+        """Replace exercise references with full exercises, fetching missing ones in one batch."""
+        shared = {}
+        missing = set()
+        for plan in plans:
+            for day in plan.get("workout_days") or []:
+                for exercise in day.get("exercises") or []:
+                    exercise_id = exercise.get("exercise_id")
+                    if exercise_id is None or exercise_id in shared or exercise_id in missing:
+                        continue
+                    cached = self.exercise_cache.get(exercise_id)
+                    if cached is None:
+                        missing.add(exercise_id)
+                    else:
+                        shared[exercise_id] = cached
+
+        if missing:
+            cursor = self.db.exercises.find({"_id": {"$in": list(missing)}})
+            async for exercise in cursor:
+                exercise_id = exercise.pop("_id")
+                self.exercise_cache.put(exercise_id, exercise)
+                shared[exercise_id] = exercise
+
+        for plan in plans:
+            for day in plan.get("workout_days") or []:
+                hydrated = []
+                for exercise in day.get("exercises") or []:
+                    exercise_id = exercise.get("exercise_id")
+                    if exercise_id is None:
+                        # Legacy plan with embedded exercises
+                        hydrated.append(exercise)
+                        continue
+                    ref = {key: value for key, value in exercise.items() if key != "exercise_id"}
+                    hydrated.append({**shared.get(exercise_id, {}), **ref})
+                day["exercises"] = hydrated
+        return plans
+
+    async def migrate_embedded_exercises(self, batch_size: int = 100):
+        """Convert stored plans that still embed full exercises to the normalized format."""
+        query = {"workout_days.exercises": {"$elemMatch": {"exercise_id": {"$exists": False}}}}
+        migrated = 0
+        cursor = self.db.workout_plans.find(query, {"workout_days": 1}).batch_size(batch_size)
+        async for plan in cursor:
+            workout_days, exercises = self._normalize_workout_days(plan.get("workout_days"))
+            await self._store_exercises(exercises)
+            await self.db.workout_plans.update_one(
+                {"_id": plan["_id"]},
+                {"$set": {"workout_days": workout_days}}
+            )
+            migrated += 1
+        return migrated
+
+    async def get_storage_stats(self):
+        """Get size statistics for the plan and exercise collections."""
+        stats = {}
+        for name in ("workout_plans", "exercises"):
+            coll_stats = await self.db.command("collStats", name)
+            stats[name] = {
+                "count": coll_stats.get("count", 0),
+                "size": coll_stats.get("size", 0),
+                "avg_obj_size": coll_stats.get("avgObjSize", 0),
+                "storage_size": coll_stats.get("storageSize", 0),
+                "total_index_size": coll_stats.get("totalIndexSize", 0),
+            }
+        stats["exercise_cache"] = self.exercise_cache.stats()
+        return stats
+
+    # Training Aggregate Operations
+    async def _apply_training_delta(self, old_plan: Optional[dict], new_plan: Optional[dict]):
+        """Incrementally move the owners' aggregates from old_plan to new_plan.
+
+        Also bumps the owners' plans_version, which changes whenever any of
+        their plans is saved, updated or deleted.
+        """
+        old_user = old_plan.get("user_id") if old_plan else None
+        new_user = new_plan.get("user_id") if new_plan else None
+        deltas: Dict[str, Dict[str, int]] = {}
+        if old_user:
+            deltas[old_user] = {key: -value for key, value in training_contribution(old_plan).items()}
+        if new_user:
+            user_delta = deltas.setdefault(new_user, {})
+            for key, value in training_contribution(new_plan).items():
+                user_delta[key] = user_delta.get(key, 0) + value
+
+        for user_id, delta in deltas.items():
+            delta = {key: value for key, value in delta.items() if value}
+            delta["plans_version"] = 1
+            await self.db.training_aggregates.update_one(
+                {"_id": user_id},
+                {"$inc": delta, "$set": {"updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+
+    async def get_training_aggregates(self, user_id: str):
+        """Get the materialized training aggregates for a user."""
+        aggregates = await self.db.training_aggregates.find_one({"_id": user_id})
+        if aggregates:
+            aggregates["user_id"] = aggregates.pop("_id")
+        return aggregates
+
+    async def rebuild_training_aggregates(self, user_id: str):
+        """Recompute a user's training aggregates from their stored plans."""
+        totals: Dict[str, int] = {}
+        cursor = self.db.workout_plans.find({"user_id": user_id}, AGGREGATE_PLAN_PROJECTION)
+        async for plan in cursor:
+            for key, value in training_contribution(plan).items():
+                totals[key] = totals.get(key, 0) + value
+
+        aggregates: Dict[str, Any] = {counter: 0 for counter in AGGREGATE_COUNTERS}
+        aggregates.update({group: {} for group in AGGREGATE_GROUPS})
+        aggregates["updated_at"] = datetime.utcnow()
+        for key, value in totals.items():
+            if "." in key:
+                group, name = key.split(".", 1)
+                aggregates[group][name] = value
+            else:
+                aggregates[key] = value
+        # Keep plans_version moving forward so cached plan lists stay valid
+        await self.db.training_aggregates.update_one(
+            {"_id": user_id},
+            {"$set": aggregates, "$inc": {"plans_version": 1}},
+            upsert=True
+        )
+        return aggregates
+
+    async def get_user_plans_version(self, user_id: str) -> int:
+        """Get the version of a user's plan collection, bumped on every plan change."""
+        aggregates = await self.db.training_aggregates.find_one({"_id": user_id}, {"plans_version": 1})
+        return aggregates.get("plans_version", 0) if aggregates else 0
+
+    async def rebuild_all_training_aggregates(self):
+        """Recompute training aggregates for every user with stored plans."""
+        rebuilt = 0
+        cursor = self.db.workout_plans.aggregate([{"$group": {"_id": "$user_id"}}])
+        async for group in cursor:
+            if group["_id"] is None:
+                continue
+            await self.rebuild_training_aggregates(group["_id"])
+            rebuilt += 1
+        return rebuilt
+
     # Workout Plan Operations
     async def save_workout_plan(self, workout_plan: dict):
         """Save a workout plan."""
-        workout_plan["created_at"] = datetime.utcnow()
-        result = await self.db.workout_plans.insert_one(workout_plan)
+        workout_plan["created_at"] = workout_plan["updated_at"] = datetime.utcnow()
+        workout_days, exercises = self._normalize_workout_days(workout_plan.get("workout_days"))
+        await self._store_exercises(exercises)
+        stored_plan = {**workout_plan, "workout_days": workout_days, "version": 1}
+        result = await self.db.workout_plans.insert_one(stored_plan)
+        await self._apply_training_delta(None, stored_plan)
         return str(result.inserted_id)
 
     async def get_workout_plan(self, plan_id: str):
@@ -115,38 +428,157 @@ class MongoDBController:
         plan = await self.db.workout_plans.find_one({"_id": ObjectId(plan_id)})
         if plan:
             plan["id"] = str(plan["_id"])
+            await self._hydrate_workout_plans([plan])
         return plan
 
+    async def get_workout_plan_version(self, plan_id: str):
+        """Get a workout plan's owner and version without loading the plan."""
+        if not ObjectId.is_valid(plan_id):
+            return None
+        plan = await self.db.workout_plans.find_one(
+            {"_id": ObjectId(plan_id)},
+            {"user_id": 1, "version": 1}
+        )
+        if plan:
+            return {"user_id": plan.get("user_id"), "version": plan.get("version", 0)}
+        return None
+
     async def get_user_workout_plans(self, user_id: str):
         """Get all workout plans for a user."""
         cursor = self.db.workout_plans.find({"user_id": user_id})
         plans = await cursor.to_list(length=100)
         for plan in plans:
             plan["id"] = str(plan["_id"])
+        await self._hydrate_workout_plans(plans)
         return plans
 
+    async def search_workout_plans(self, user_id: str, text: Optional[str] = None,
+                                   filters: Optional[Dict[str, List[str]]] = None,
+                                   page: int = 1, page_size: int = 20):
+        """Search a user's workout plans, returning summary hits, the total and facet counts."""
+        from pymongo import DESCENDING
+        match: Dict[str, Any] = {"user_id": user_id}
+        if text:
+            match["$text"] = {"$search": text}
+        for field, values in (filters or {}).items():
+            if values:
+                match[f"workout_days.exercises.{field}"] = {"$in": values}
+
+        # Hits come from a plain find so (user_id, created_at) or the text index
+        # can serve the ordering; $facet sub-pipelines cannot use indexes
+        projection: Dict[str, Any] = {
+            "title": 1,
+            "description": 1,
+            "fitness_level": 1,
+            "goals": 1,
+            "created_at": 1,
+            "workout_day_count": {"$size": {"$ifNull": ["$workout_days", []]}},
+        }
+        if text:
+            projection["score"] = {"$meta": "textScore"}
+            sort = [("score", {"$meta": "textScore"}), ("created_at", DESCENDING)]
+        else:
+            sort = [("created_at", DESCENDING)]
+        hits_cursor = self.db.workout_plans.find(match, projection).sort(sort) \
+            .skip((page - 1) * page_size).limit(page_size)
+
+        # Total and facet counts only need the facet fields of each matching plan
+        facets: Dict[str, Any] = {"total": [{"$count": "count"}]}
+        for field in PLAN_SEARCH_FACETS:
+            facets[field] = [
+                {"$unwind": "$workout_days"},
+                {"$unwind": "$workout_days.exercises"},
+                {"$unwind": f"$workout_days.exercises.{field}"},
+                # Count each value once per plan
+                {"$group": {"_id": {"plan": "$_id", "value": f"$workout_days.exercises.{field}"}}},
+                {"$group": {"_id": "$_id.value", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": PLAN_SEARCH_FACET_LIMIT},
+            ]
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": match},
+            {"$project": {f"workout_days.exercises.{field}": 1 for field in PLAN_SEARCH_FACETS}},
+            {"$facet": facets},
+        ]
+
+        hits, results = await asyncio.gather(
+            hits_cursor.to_list(length=page_size),
+            self.db.workout_plans.aggregate(pipeline).to_list(length=1),
+        )
+        for hit in hits:
+            hit["id"] = str(hit.pop("_id"))
+        result = results[0] if results else {}
+        total = result.get("total") or [{"count": 0}]
+        return {
+            "hits": hits,
+            "total": total[0]["count"],
+            "facets": {
+                field: [
+                    {"value": facet["_id"], "count": facet["count"]}
+                    for facet in result.get(field, [])
+                    if facet["_id"] is not None
+                ]
+                for field in PLAN_SEARCH_FACETS
+            },
+        }
+
+    async def iter_user_workout_plans(self, user_id: str, updated_since: Optional[datetime] = None,
+                                      batch_size: int = 100):
+        """Iterate over all of a user's workout plans without loading them all into memory."""
+        cursor = self.db.workout_plans.find(
+            _modified_since_query(user_id, updated_since)
+        ).sort(EXPORT_SORT).batch_size(batch_size)
+        batch = []
+        async for plan in cursor:
+            plan["id"] = str(plan.pop("_id"))
+            batch.append(plan)
+            if len(batch) >= batch_size:
+                for hydrated in await self._hydrate_workout_plans(batch):
+                    yield hydrated
+                batch = []
+        for hydrated in await self._hydrate_workout_plans(batch):
+            yield hydrated
+
     async def update_workout_plan(self, plan_id: str, plan_data: dict):
         """Update a workout plan."""
         if not ObjectId.is_valid(plan_id):
             return False
+        from pymongo import ReturnDocument
         plan_data["updated_at"] = datetime.utcnow()
-        result = await self.db.workout_plans.update_one(
+        update = dict(plan_data)
+        # The version only moves forward through $inc
+        update.pop("version", None)
+        if "workout_days" in update:
+            update["workout_days"], exercises = self._normalize_workout_days(update["workout_days"])
+            await self._store_exercises(exercises)
+        previous = await self.db.workout_plans.find_one_and_update(
             {"_id": ObjectId(plan_id)}, 
-            {"$set": plan_data}
+            {"$set": update, "$inc": {"version": 1}},
+            projection=AGGREGATE_PLAN_PROJECTION,
+            return_document=ReturnDocument.BEFORE
         )
-        return result.modified_count > 0
+        if previous is None:
+            return False
+        await self._apply_training_delta(previous, {**previous, **update})
+        return True
 
     async def delete_workout_plan(self, plan_id: str):
         """Delete a workout plan."""
         if not ObjectId.is_valid(plan_id):
             return False
-        result = await self.db.workout_plans.delete_one({"_id": ObjectId(plan_id)})
-        return result.deleted_count > 0
+        deleted = await self.db.workout_plans.find_one_and_delete(
+            {"_id": ObjectId(plan_id)},
+            projection=AGGREGATE_PLAN_PROJECTION
+        )
+        if deleted is None:
+            return False
+        await self._apply_training_delta(deleted, None)
+        return True
     
     # Daily Schedule Operations
     async def save_daily_schedule(self, schedule: dict):
         """Save a daily schedule."""
-        schedule["created_at"] = datetime.utcnow()
+        schedule["created_at"] = schedule["updated_at"] = datetime.utcnow()
         result = await self.db.daily_schedules.insert_one(schedule)
         return str(result.inserted_id)
     
@@ -167,6 +599,16 @@ class MongoDBController:
             schedule["id"] = str(schedule["_id"])
         return schedules
     
+    async def iter_user_daily_schedules(self, user_id: str, updated_since: Optional[datetime] = None,
+                                        batch_size: int = 100):
+        """Iterate over all of a user's daily schedules without loading them all into memory."""
+        cursor = self.db.daily_schedules.find(
+            _modified_since_query(user_id, updated_since)
+        ).sort(EXPORT_SORT).batch_size(batch_size)
+        async for schedule in cursor:
+            schedule["id"] = str(schedule.pop("_id"))
+            yield schedule
+    
     async def update_daily_schedule(self, schedule_id: str, schedule_data: dict):
         """Update a daily schedule."""
         if not ObjectId.is_valid(schedule_id):
@@ -187,8 +629,28 @@ class MongoDBController:
 
 
 # Usage example
-async def initialize_mongodb(mongodb_url: str, db_name: str) -> MongoDBController:
+async def initialize_mongodb(mongodb_url: str, db_name: str, exercise_cache_size: int = 1024) -> MongoDBController:
     """Initialize MongoDB connection and return controller."""
     mongo_config = MongoDBConfig(mongodb_url, db_name)
     db = await mongo_config.connect()
-    return MongoDBController(db)
+    return MongoDBController(db, exercise_cache_size)
+
+# Shared controller used by the API controllers, created on first use
+_mongodb_controller: Optional[MongoDBController] = None
+_mongodb_controller_lock: Optional[asyncio.Lock] = None
+
+async def get_mongodb_controller() -> MongoDBController:
+    """Get the shared MongoDB controller, connecting on first use."""
+    global _mongodb_controller, _mongodb_controller_lock
+    if _mongodb_controller is None:
+        if _mongodb_controller_lock is None:
+            _mongodb_controller_lock = asyncio.Lock()
+        async with _mongodb_controller_lock:
+            if _mongodb_controller is None:
+                from config import settings
+                _mongodb_controller = await initialize_mongodb(
+                    settings.mongodb_url,
+                    settings.mongodb_db_name,
+                    settings.exercise_cache_size,
+                )
+    return _mongodb_controller
@@ -0,0 +1,121 @@
+"""Compare the CPU cost and size of /api/ai-planner/plans responses.
+
+Measures the response_model path of FastAPI before 0.130 (dump the models,
+re-validate them, then encode with the standard JSON encoder) against the
+current one (models passed through and serialized to JSON bytes by Pydantic)
+and reports bytes on the wire with gzip and, when the brotli package is
+installed, brotli.
+
+    python benchmarks/serialization_benchmark.py --plans 50 --iterations 200
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.ai_planner import Exercise, WorkoutDay, WorkoutPlan
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def build_plans(count: int) -> List[WorkoutPlan]:
+    """Build plans shaped like generated ones, with long instructions and alternatives."""
+    plans = []
+    for plan_index in range(count):
+        workout_days = [
+            WorkoutDay(
+                day=f"Day {day_index + 1}",
+                focus="Full Body",
+                exercises=[
+                    Exercise(
+                        name=f"Exercise {exercise_index}",
+                        sets=3,
+                        reps="8-12",
+                        rest_time="60s",
+                        description="A compound movement that builds strength and muscle. " * 3,
+                        equipment=["Dumbbells", "Bench"],
+                        muscle_groups=["Chest", "Triceps", "Shoulders"],
+                        difficulty="intermediate",
+                        instructions="Keep your core braced and control the movement through the full range. " * 5,
+                        alternatives=["Push-ups", "Machine Press", "Cable Fly"],
+                    )
+                    for exercise_index in range(6)
+                ],
+                warm_up="5 minutes of light cardio followed by dynamic stretches",
+                cool_down="5 minutes of static stretching",
+                total_time=60,
+            )
+            for day_index in range(4)
+        ]
+        plans.append(WorkoutPlan(
+            id=f"{plan_index:024x}",
+            user_id="johndoe",
+            title=f"Strength Plan {plan_index}",
+            description="A four day plan focused on building strength and muscle.",
+            fitness_level="intermediate",
+            goals=["Build muscle", "Increase strength"],
+            workout_days=workout_days,
+            created_at=datetime.utcnow(),
+            notes="Increase the weight once all sets are completed with good form.",
+        ))
+    return plans
+
+def previous_path(plans: List[WorkoutPlan], adapter: TypeAdapter) -> bytes:
+    # Mirrors FastAPI < 0.130 response_model handling followed by JSONResponse
+    content = [plan.model_dump(by_alias=True) for plan in plans]
+    validated = adapter.validate_python(content)
+    return json.dumps(
+        adapter.dump_python(validated, mode="json"),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+def current_path(plans: List[WorkoutPlan], adapter: TypeAdapter) -> bytes:
+    # Mirrors FastAPI >= 0.130 when the endpoint returns the models themselves
+    return adapter.dump_json(adapter.validate_python(plans), by_alias=True)
+
+def measure(label: str, render, iterations: int) -> bytes:
+    body = render()
+    start = time.process_time()
+    for _ in range(iterations):
+        render()
+    cpu_ms = (time.process_time() - start) * 1000 / iterations
+    print(f"{label:<32} {cpu_ms:8.3f} ms CPU/response")
+    return body
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=50, help="Plans per response")
+    parser.add_argument("--iterations", type=int, default=200, help="Responses rendered per measurement")
+    args = parser.parse_args()
+
+    plans = build_plans(args.plans)
+    adapter = TypeAdapter(List[WorkoutPlan])
+
+    print(f"Serialization of {args.plans} plans")
+    previous = measure("response_model + json", lambda: previous_path(plans, adapter), args.iterations)
+    current = measure("models + dump_json", lambda: current_path(plans, adapter), args.iterations)
+    measure("models + dump_json + gzip", lambda: gzip.compress(current_path(plans, adapter), 9), args.iterations)
+    if brotli is not None:
+        measure("models + dump_json + brotli", lambda: brotli.compress(current_path(plans, adapter), quality=4), args.iterations)
+
+    print()
+    print("Bytes on the wire")
+    print(f"{'json (previous)':<32} {len(previous):10d}")
+    print(f"{'dump_json':<32} {len(current):10d}")
+    print(f"{'dump_json + gzip':<32} {len(gzip.compress(current, 9)):10d}")
+    if brotli is not None:
+        print(f"{'dump_json + brotli':<32} {len(brotli.compress(current, quality=4)):10d}")
+
+if __name__ == "__main__":
+    main()
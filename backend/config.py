@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 import os
@@ -15,10 +15,47 @@ class EnvVars(str, Enum):
     JWT_SECRET = "JWT_SECRET"
     JWT_ALGORITHM = "JWT_ALGORITHM"
     ACCESS_TOKEN_EXPIRE_MINUTES = "ACCESS_TOKEN_EXPIRE_MINUTES"
+    ADMIN_USERNAMES = "ADMIN_USERNAMES"
     
     # MongoDB Settings
     MONGODB_URL = "MONGODB_URL"
     MONGODB_DB_NAME = "MONGODB_DB_NAME"
+    EXERCISE_CACHE_SIZE = "EXERCISE_CACHE_SIZE"
+    
+    # Response Settings
+    COMPRESSION_MINIMUM_SIZE = "COMPRESSION_MINIMUM_SIZE"
+    
+    # Workout Plan Pre-generation Settings
+    PREGENERATION_ENABLED = "PREGENERATION_ENABLED"
+    PREGENERATION_POOL_SIZE = "PREGENERATION_POOL_SIZE"
+    PREGENERATION_MAX_PROFILES = "PREGENERATION_MAX_PROFILES"
+    PREGENERATION_MIN_REQUESTS = "PREGENERATION_MIN_REQUESTS"
+    PREGENERATION_TTL_SECONDS = "PREGENERATION_TTL_SECONDS"
+    PREGENERATION_BUDGET_PER_HOUR = "PREGENERATION_BUDGET_PER_HOUR"
+    PREGENERATION_REFILL_INTERVAL_SECONDS = "PREGENERATION_REFILL_INTERVAL_SECONDS"
+    PREGENERATION_MAX_LIVE_GENERATIONS = "PREGENERATION_MAX_LIVE_GENERATIONS"
+    
+    # Admission Control Settings
+    ADMISSION_ENABLED = "ADMISSION_ENABLED"
+    ADMISSION_ANONYMOUS_WEIGHT = "ADMISSION_ANONYMOUS_WEIGHT"
+    ADMISSION_GENERATION_MAX_CONCURRENCY = "ADMISSION_GENERATION_MAX_CONCURRENCY"
+    ADMISSION_GENERATION_PER_USER_CONCURRENCY = "ADMISSION_GENERATION_PER_USER_CONCURRENCY"
+    ADMISSION_GENERATION_RATE_PER_SECOND = "ADMISSION_GENERATION_RATE_PER_SECOND"
+    ADMISSION_GENERATION_BURST = "ADMISSION_GENERATION_BURST"
+    ADMISSION_GENERATION_MAX_QUEUE = "ADMISSION_GENERATION_MAX_QUEUE"
+    ADMISSION_GENERATION_QUEUE_TIMEOUT_SECONDS = "ADMISSION_GENERATION_QUEUE_TIMEOUT_SECONDS"
+    ADMISSION_READ_MAX_CONCURRENCY = "ADMISSION_READ_MAX_CONCURRENCY"
+    ADMISSION_READ_PER_USER_CONCURRENCY = "ADMISSION_READ_PER_USER_CONCURRENCY"
+    ADMISSION_READ_RATE_PER_SECOND = "ADMISSION_READ_RATE_PER_SECOND"
+    ADMISSION_READ_BURST = "ADMISSION_READ_BURST"
+    ADMISSION_READ_MAX_QUEUE = "ADMISSION_READ_MAX_QUEUE"
+    ADMISSION_READ_QUEUE_TIMEOUT_SECONDS = "ADMISSION_READ_QUEUE_TIMEOUT_SECONDS"
+    ADMISSION_AUTH_MAX_CONCURRENCY = "ADMISSION_AUTH_MAX_CONCURRENCY"
+    ADMISSION_AUTH_PER_USER_CONCURRENCY = "ADMISSION_AUTH_PER_USER_CONCURRENCY"
+    ADMISSION_AUTH_RATE_PER_SECOND = "ADMISSION_AUTH_RATE_PER_SECOND"
+    ADMISSION_AUTH_BURST = "ADMISSION_AUTH_BURST"
+    ADMISSION_AUTH_MAX_QUEUE = "ADMISSION_AUTH_MAX_QUEUE"
+    ADMISSION_AUTH_QUEUE_TIMEOUT_SECONDS = "ADMISSION_AUTH_QUEUE_TIMEOUT_SECONDS"
 
 # Define Gemini model names as Enum
 class GeminiModels(str, Enum):
@@ -35,47 +72,71 @@ class Settings(BaseSettings):
     jwt_secret: str = Field(..., env=EnvVars.JWT_SECRET)
     jwt_algorithm: str = Field("HS256", env=EnvVars.JWT_ALGORITHM)
     access_token_expire_minutes: int = Field(30, env=EnvVars.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Users allowed to read service-wide operational endpoints, as a JSON list
+    admin_usernames: List[str] = Field(default_factory=list, env=EnvVars.ADMIN_USERNAMES)
     
     # MongoDB Settings
     mongodb_url: str = Field("mongodb://localhost:27017", env=EnvVars.MONGODB_URL)
     mongodb_db_name: str = Field("flex_db", env=EnvVars.MONGODB_DB_NAME)
+    # Number of shared exercise documents kept in memory for plan hydration
+    exercise_cache_size: int = Field(1024, env=EnvVars.EXERCISE_CACHE_SIZE)
     
     # Gemini Model Settings
     gemini_model: str = GeminiModels.GEMINI_PRO
     
+    # Response Settings
+    # Responses smaller than this many bytes are sent uncompressed
+    compression_minimum_size: int = Field(1000, env=EnvVars.COMPRESSION_MINIMUM_SIZE)
+    
+    # Workout Plan Pre-generation Settings
+    pregeneration_enabled: bool = Field(False, env=EnvVars.PREGENERATION_ENABLED)
+    # Ready plans kept per popular request profile
+    pregeneration_pool_size: int = Field(2, env=EnvVars.PREGENERATION_POOL_SIZE)
+    # Number of most requested profiles to keep plans for
+    pregeneration_max_profiles: int = Field(20, env=EnvVars.PREGENERATION_MAX_PROFILES)
+    # Decayed request count a profile needs before plans are pre-generated for it
+    pregeneration_min_requests: float = Field(3, env=EnvVars.PREGENERATION_MIN_REQUESTS)
+    pregeneration_ttl_seconds: int = Field(21600, env=EnvVars.PREGENERATION_TTL_SECONDS)
+    # Maximum provider calls per hour spent on pre-generation
+    pregeneration_budget_per_hour: int = Field(60, env=EnvVars.PREGENERATION_BUDGET_PER_HOUR)
+    pregeneration_refill_interval_seconds: int = Field(30, env=EnvVars.PREGENERATION_REFILL_INTERVAL_SECONDS)
+    # Pre-generate only while at most this many user generations are in flight
+    pregeneration_max_live_generations: int = Field(0, env=EnvVars.PREGENERATION_MAX_LIVE_GENERATIONS)
+    
+    # Admission Control Settings
+    admission_enabled: bool = Field(True, env=EnvVars.ADMISSION_ENABLED)
+    # Fair-share weight of clients without a valid token, relative to signed-in users
+    admission_anonymous_weight: float = Field(0.5, env=EnvVars.ADMISSION_ANONYMOUS_WEIGHT, gt=0)
+    # Workout plan generation
+    admission_generation_max_concurrency: int = Field(8, env=EnvVars.ADMISSION_GENERATION_MAX_CONCURRENCY, ge=1)
+    admission_generation_per_user_concurrency: int = Field(1, env=EnvVars.ADMISSION_GENERATION_PER_USER_CONCURRENCY, ge=1)
+    admission_generation_rate_per_second: float = Field(0.2, env=EnvVars.ADMISSION_GENERATION_RATE_PER_SECOND, gt=0)
+    admission_generation_burst: int = Field(3, env=EnvVars.ADMISSION_GENERATION_BURST, ge=1)
+    admission_generation_max_queue: int = Field(32, env=EnvVars.ADMISSION_GENERATION_MAX_QUEUE, ge=0)
+    admission_generation_queue_timeout_seconds: float = Field(10.0, env=EnvVars.ADMISSION_GENERATION_QUEUE_TIMEOUT_SECONDS, gt=0)
+    # Reads and other API routes
+    admission_read_max_concurrency: int = Field(64, env=EnvVars.ADMISSION_READ_MAX_CONCURRENCY, ge=1)
+    admission_read_per_user_concurrency: int = Field(8, env=EnvVars.ADMISSION_READ_PER_USER_CONCURRENCY, ge=1)
+    admission_read_rate_per_second: float = Field(20.0, env=EnvVars.ADMISSION_READ_RATE_PER_SECOND, gt=0)
+    admission_read_burst: int = Field(40, env=EnvVars.ADMISSION_READ_BURST, ge=1)
+    admission_read_max_queue: int = Field(256, env=EnvVars.ADMISSION_READ_MAX_QUEUE, ge=0)
+    admission_read_queue_timeout_seconds: float = Field(2.0, env=EnvVars.ADMISSION_READ_QUEUE_TIMEOUT_SECONDS, gt=0)
+    # Authentication
+    admission_auth_max_concurrency: int = Field(16, env=EnvVars.ADMISSION_AUTH_MAX_CONCURRENCY, ge=1)
+    admission_auth_per_user_concurrency: int = Field(2, env=EnvVars.ADMISSION_AUTH_PER_USER_CONCURRENCY, ge=1)
+    admission_auth_rate_per_second: float = Field(1.0, env=EnvVars.ADMISSION_AUTH_RATE_PER_SECOND, gt=0)
+    admission_auth_burst: int = Field(5, env=EnvVars.ADMISSION_AUTH_BURST, ge=1)
+    admission_auth_max_queue: int = Field(64, env=EnvVars.ADMISSION_AUTH_MAX_QUEUE, ge=0)
+    admission_auth_queue_timeout_seconds: float = Field(2.0, env=EnvVars.ADMISSION_AUTH_QUEUE_TIMEOUT_SECONDS, gt=0)
+    
     class Config:
-        env_file = ".env"
+        # Possible .env file locations, later files take priority. Missing
+        # files are skipped when the settings are loaded.
+        env_file = (
+            Path(__file__).parent / ".env",  # Same directory as this file
+            Path(".env"),  # Current directory
+        )
         env_file_encoding = "utf-8"
-        # Try multiple locations for .env file
-        @classmethod
-        def customise_sources(
-            cls,
-            init_settings,
-            env_settings,
-            file_secret_settings,
-        ):
-            # Define possible .env file locations
-            env_file_locations = [
-                Path(".env"),  # Current directory
-                Path(__file__).parent / ".env",  # Same directory as this file
-                Path.home() / ".env",  # User's home directory
-            ]
-            
-            # Try to find .env file in different locations
-            for env_file in env_file_locations:
-                if env_file.exists():
-                    return (
-                        init_settings,
-                        env_settings,
-                        file_secret_settings,
-                    )
-            
-            # If no .env file found, just use environment variables
-            return (
-                init_settings,
-                env_settings,
-                file_secret_settings,
-            )
 
 # Create a global settings instance
 settings = Settings()
\ No newline at end of file
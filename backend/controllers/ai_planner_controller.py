@@ -1,15 +1,24 @@
 import os
 from typing import Dict, Any, List, Optional
-from models.ai_planner import WorkoutPlanRequest, WorkoutPlan, Exercise, WorkoutDay
+from models.ai_planner import WorkoutPlanRequest, WorkoutPlan, Exercise, WorkoutDay, PlanSearchResponse
 from datetime import datetime
 import json
-import uuid
-import google.generativeai as genai
+import asyncio
+import hashlib
 import pathlib
 from config import settings, GeminiModels
+from Database import get_mongodb_controller
+from controllers.pregeneration_controller import pregeneration_pool
 
-# Configure Google Generative AI with the API key from settings
-try:
+# Google Generative AI is a heavy import, it is imported and configured on first use
+_genai = None
+
+def get_genai():
+    """Import and configure Google Generative AI with the API key from settings"""
+    global _genai
+    if _genai is not None:
+        return _genai
+    
     # Validate the API key
     if not settings.gemini_api_key:
         raise ValueError("GEMINI_API_KEY environment variable is not set. Please set it in your .env file.")
@@ -18,49 +27,41 @@ try:
     if not settings.gemini_api_key.startswith("AIza"):
         raise ValueError("GEMINI_API_KEY appears to be invalid. Google API keys typically start with 'AIza'. Please check your .env file.")
     
-    # Configure Gemini with the API key from settings and set API version
-    genai.configure(
-        api_key=settings.gemini_api_key,
-        transport="rest",
-        client_options={"api_endpoint": "generativelanguage.googleapis.com"}
-    )
-    
-    # Test the API key with a simple request
-    def test_gemini_api_key():
-        try:
-            # Use the model name from settings with correct API version
-            model = genai.GenerativeModel(
-                model_name=settings.gemini_model,
-                generation_config={
-                    "temperature": 0.9,
-                    "top_p": 1,
-                    "top_k": 1,
-                    "max_output_tokens": 2048,
-                }
-            )
-            response = model.generate_content("Hello, this is a test request to verify API key validity.")
-            return True
-        except Exception as e:
-            error_message = str(e).lower()
-            if "api key" in error_message or "authentication" in error_message or "unauthorized" in error_message:
-                raise ValueError(f"Invalid Gemini API key: {str(e)}. Please check your API key in the .env file.")
-            else:
-                raise Exception(f"Error testing Gemini API: {str(e)}")
-    
-    # Test the API key
-    test_gemini_api_key()
+    try:
+        import google.generativeai as genai
+        
+        # Configure Gemini with the API key from settings and set API version
+        genai.configure(
+            api_key=settings.gemini_api_key,
+            transport="rest",
+            client_options={"api_endpoint": "generativelanguage.googleapis.com"}
+        )
+    except Exception as e:
+        raise ValueError(f"Failed to configure Google Generative AI: {str(e)}. Please check your API key.")
     
-except Exception as e:
-    raise ValueError(f"Failed to configure Google Generative AI: {str(e)}. Please check your API key.")
-
+    _genai = genai
+    return _genai
 
-# Mock database for workout plans (replace with actual database in production)
-workout_plans_db = {}
 
 class AIPlannerController:
     @staticmethod
     async def generate_workout_plan(request: WorkoutPlanRequest, user_id: Optional[str] = None) -> WorkoutPlan:
-        """Generate a workout plan using Google's Gemini API"""
+        """Generate a workout plan, serving a pre-generated one when available, and save it"""
+        pregeneration_pool.record_request(request)
+        workout_plan = pregeneration_pool.take(request, user_id)
+        if workout_plan is None:
+            with pregeneration_pool.live_generation():
+                workout_plan = await AIPlannerController.create_workout_plan(request, user_id)
+        
+        # Save workout plan to database
+        db = await get_mongodb_controller()
+        workout_plan.id = await db.save_workout_plan(workout_plan.model_dump(exclude={"id"}))
+        
+        return workout_plan
+    
+    @staticmethod
+    async def create_workout_plan(request: WorkoutPlanRequest, user_id: Optional[str] = None) -> WorkoutPlan:
+        """Create a workout plan using Google's Gemini API without saving it"""
         
         # Create prompt for OpenAI
         prompt = f"""
@@ -123,6 +124,7 @@ class AIPlannerController:
             }
             
             # Initialize Gemini model
+            genai = get_genai()
             model = genai.GenerativeModel(
                 model_name=settings.gemini_model,
                 generation_config=generation_config
@@ -134,7 +136,8 @@ class AIPlannerController:
             
             # Call Gemini API
             try:
-                response = model.generate_content(full_prompt)
+                # The client is synchronous, run it off the event loop
+                response = await asyncio.to_thread(model.generate_content, full_prompt)
                 
                 # Extract the response content
                 result = response.text
@@ -151,7 +154,6 @@ class AIPlannerController:
             
             # Create workout plan
             workout_plan = WorkoutPlan(
-                id=str(uuid.uuid4()),
                 user_id=user_id,
                 title=workout_plan_dict.get("title"),
                 description=workout_plan_dict.get("description"),
@@ -185,10 +187,6 @@ class AIPlannerController:
                 metadata=workout_plan_dict.get("metadata")
             )
             
-            # Save workout plan to database
-            if workout_plan.id:
-                workout_plans_db[workout_plan.id] = workout_plan
-            
             return workout_plan
             
         except ValueError as e:
@@ -201,17 +199,65 @@ class AIPlannerController:
     @staticmethod
     async def get_workout_plan(plan_id: str) -> Optional[WorkoutPlan]:
         """Get a workout plan by ID"""
-        return workout_plans_db.get(plan_id)
+        db = await get_mongodb_controller()
+        plan = await db.get_workout_plan(plan_id)
+        return WorkoutPlan(**plan) if plan else None
+    
+    @staticmethod
+    async def get_workout_plan_etag(plan_id: str) -> Optional[Dict[str, Any]]:
+        """Get a workout plan's owner and ETag without loading the plan
+
+        ETags are weak because the same version is served gzip, brotli or
+        identity encoded, and a strong ETag must differ per encoding.
+        """
+        db = await get_mongodb_controller()
+        version = await db.get_workout_plan_version(plan_id)
+        if not version:
+            return None
+        return {"user_id": version["user_id"], "etag": f'W/"{plan_id}-{version["version"]}"'}
+    
+    @staticmethod
+    async def get_user_workout_plans_etag(user_id: str) -> str:
+        """Get an ETag for a user's plan list, which changes whenever any of their plans changes"""
+        db = await get_mongodb_controller()
+        version = await db.get_user_plans_version(user_id)
+        user_hash = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:12]
+        return f'W/"plans-{user_hash}-{version}"'
     
     @staticmethod
     async def get_user_workout_plans(user_id: str) -> List[WorkoutPlan]:
         """Get all workout plans for a user"""
-        return [plan for plan in workout_plans_db.values() if plan.user_id == user_id]
+        db = await get_mongodb_controller()
+        plans = await db.get_user_workout_plans(user_id)
+        return [WorkoutPlan(**plan) for plan in plans]
+    
+    @staticmethod
+    async def search_workout_plans(
+        user_id: str,
+        query: Optional[str] = None,
+        muscle_groups: Optional[List[str]] = None,
+        equipment: Optional[List[str]] = None,
+        difficulty: Optional[List[str]] = None,
+        page: int = 1,
+        page_size: int = 20
+    ) -> PlanSearchResponse:
+        """Search a user's workout plans with facet counts"""
+        db = await get_mongodb_controller()
+        result = await db.search_workout_plans(
+            user_id,
+            text=query,
+            filters={
+                "muscle_groups": muscle_groups,
+                "equipment": equipment,
+                "difficulty": difficulty,
+            },
+            page=page,
+            page_size=page_size
+        )
+        return PlanSearchResponse(page=page, page_size=page_size, **result)
     
     @staticmethod
     async def delete_workout_plan(plan_id: str) -> bool:
         """Delete a workout plan"""
-        if plan_id in workout_plans_db:
-            del workout_plans_db[plan_id]
-            return True
-        return False
\ No newline at end of file
+        db = await get_mongodb_controller()
+        return await db.delete_workout_plan(plan_id)
\ No newline at end of file
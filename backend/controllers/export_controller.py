@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from Database import get_mongodb_controller
+
+# Columns of the flattened CSV export; plans contribute one row per exercise
+# and daily schedules one row per schedule item
+CSV_COLUMNS = [
+    "record_type", "record_id", "title", "created_at", "updated_at",
+    "day", "focus", "name", "sets", "reps", "rest_time",
+    "muscle_groups", "equipment", "difficulty",
+    "time", "duration", "priority",
+]
+
+def _json_default(value: Any):
+    """Serialize values the standard JSON encoder does not handle."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _join(values: Optional[List[Any]]) -> str:
+    return "; ".join(str(value) for value in values or [])
+
+def _workout_plan_rows(plan: Dict[str, Any]):
+    base = {
+        "record_type": "workout_plan",
+        "record_id": plan.get("id"),
+        "title": plan.get("title"),
+        "created_at": plan.get("created_at"),
+        "updated_at": plan.get("updated_at"),
+    }
+    for day in plan.get("workout_days") or []:
+        for exercise in day.get("exercises") or []:
+            yield {
+                **base,
+                "day": day.get("day"),
+                "focus": day.get("focus"),
+                "name": exercise.get("name"),
+                "sets": exercise.get("sets"),
+                "reps": exercise.get("reps"),
+                "rest_time": exercise.get("rest_time"),
+                "muscle_groups": _join(exercise.get("muscle_groups")),
+                "equipment": _join(exercise.get("equipment")),
+                "difficulty": exercise.get("difficulty"),
+            }
+
+def _daily_schedule_rows(schedule: Dict[str, Any]):
+    base = {
+        "record_type": "daily_schedule",
+        "record_id": schedule.get("id"),
+        "created_at": schedule.get("created_at"),
+        "updated_at": schedule.get("updated_at"),
+    }
+    for item in schedule.get("dailySchedule") or []:
+        yield {
+            **base,
+            "name": item.get("activity"),
+            "time": item.get("time"),
+            "duration": item.get("duration"),
+            "priority": item.get("priority"),
+        }
+
+ExportRecord = Tuple[str, Dict[str, Any]]
+
+async def _export_records(db, user_id: str, updated_since: Optional[datetime]) -> AsyncIterator[ExportRecord]:
+    async for plan in db.iter_user_workout_plans(user_id, updated_since):
+        yield "workout_plan", plan
+    async for schedule in db.iter_user_daily_schedules(user_id, updated_since):
+        yield "daily_schedule", schedule
+
+async def _prepend(first: Optional[ExportRecord], records: AsyncIterator[ExportRecord]) -> AsyncIterator[ExportRecord]:
+    if first is not None:
+        yield first
+    async for record in records:
+        yield record
+
+class ExportController:
+    @staticmethod
+    async def open_export(user_id: str, updated_since: Optional[datetime] = None) -> AsyncIterator[ExportRecord]:
+        """Start reading a user's export records
+
+        The database controller is resolved and the first record fetched before
+        returning, so connection and query errors surface while an error
+        response can still be sent.
+        """
+        db = await get_mongodb_controller()
+        records = _export_records(db, user_id, updated_since)
+        try:
+            first = await records.__anext__()
+        except StopAsyncIteration:
+            first = None
+        return _prepend(first, records)
+
+    @staticmethod
+    async def stream_ndjson(records: AsyncIterator[ExportRecord]) -> AsyncIterator[bytes]:
+        """Stream export records as NDJSON"""
+        async for record_type, document in records:
+            record = {"record_type": record_type, **document}
+            yield (json.dumps(record, default=_json_default) + "\n").encode("utf-8")
+
+    @staticmethod
+    async def stream_csv(records: AsyncIterator[ExportRecord]) -> AsyncIterator[bytes]:
+        """Stream export records as flattened CSV"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+        row_builders = {
+            "workout_plan": _workout_plan_rows,
+            "daily_schedule": _daily_schedule_rows,
+        }
+
+        def flush() -> bytes:
+            data = buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+            return data
+
+        writer.writeheader()
+        yield flush()
+        async for record_type, document in records:
+            writer.writerows(row_builders[record_type](document))
+            yield flush()
@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from models.ai_planner import WorkoutPlanRequest, WorkoutPlan
+from config import settings
+
+# Multiplier applied to every profile's request count once per refill interval,
+# so the pool follows shifts in traffic
+DEMAND_DECAY = 0.95
+# Profiles tracked per pooled profile before the least requested ones are forgotten
+TRACKED_PROFILES_FACTOR = 10
+
+def _normalize(values: Optional[List[str]]) -> List[str]:
+    return sorted({value.strip().lower() for value in values or [] if value and value.strip()})
+
+def request_fingerprint(request: WorkoutPlanRequest) -> str:
+    """Return a fingerprint identifying requests that can be served by the same plan."""
+    profile = {
+        "fitness_level": request.fitness_level.strip().lower(),
+        "goals": _normalize(request.goals),
+        "available_equipment": _normalize(request.available_equipment),
+        "workout_days_per_week": request.workout_days_per_week,
+        "time_per_session": request.time_per_session,
+        "preferences": _normalize(request.preferences),
+        "limitations": _normalize(request.limitations),
+    }
+    payload = json.dumps(profile, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+class PregenerationPool:
+    """Pool of ready workout plans for the most requested request profiles.
+
+    Requests are fingerprinted on every generation. While no live generations
+    are in flight, a background task keeps up to ``pool_size`` unexpired plans
+    for each of the ``max_profiles`` hottest profiles, spending at most
+    ``budget_per_hour`` provider calls on it.
+    """
+    def __init__(
+        self,
+        pool_size: int = 2,
+        max_profiles: int = 20,
+        min_requests: float = 3,
+        ttl_seconds: int = 21600,
+        budget_per_hour: int = 60,
+        refill_interval_seconds: int = 30,
+        max_live_generations: int = 0
+    ):
+        self.pool_size = pool_size
+        self.max_profiles = max_profiles
+        self.min_requests = min_requests
+        self.ttl_seconds = ttl_seconds
+        self.budget_per_hour = budget_per_hour
+        self.refill_interval_seconds = refill_interval_seconds
+        self.max_live_generations = max_live_generations
+
+        self.live_generations = 0
+        self._demand: Dict[str, float] = {}
+        self._requests: Dict[str, WorkoutPlanRequest] = {}
+        self._plans: Dict[str, Deque[Tuple[float, WorkoutPlan]]] = {}
+        self._provider_calls: Deque[float] = deque()
+        self._task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.pregenerated = 0
+        self.expired = 0
+        self.failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._task is not None
+
+    # Request path
+    def record_request(self, request: WorkoutPlanRequest):
+        """Count a request towards its profile's popularity."""
+        if not self.enabled:
+            return
+        fingerprint = request_fingerprint(request)
+        self._demand[fingerprint] = self._demand.get(fingerprint, 0.0) + 1
+        self._requests.setdefault(fingerprint, request)
+
+    def take(self, request: WorkoutPlanRequest, user_id: Optional[str] = None) -> Optional[WorkoutPlan]:
+        """Hand out a pre-generated plan matching the request, if one is ready."""
+        if not self.enabled:
+            return None
+        plans = self._plans.get(request_fingerprint(request))
+        now = time.monotonic()
+        while plans:
+            created, plan = plans.popleft()
+            if now - created > self.ttl_seconds:
+                self.expired += 1
+                continue
+            self.hits += 1
+            return plan.model_copy(update={"user_id": user_id, "created_at": datetime.now()})
+        self.misses += 1
+        return None
+
+    @contextmanager
+    def live_generation(self):
+        """Mark a user-facing generation as in flight so refills yield provider capacity."""
+        self.live_generations += 1
+        try:
+            yield
+        finally:
+            self.live_generations -= 1
+
+    # Background refill
+    def hot_profiles(self) -> List[str]:
+        """Return the fingerprints worth keeping plans for, hottest first."""
+        ranked = sorted(self._demand.items(), key=lambda item: item[1], reverse=True)
+        return [fingerprint for fingerprint, demand in ranked[:self.max_profiles] if demand >= self.min_requests]
+
+    def _decay(self):
+        for fingerprint in list(self._demand):
+            self._demand[fingerprint] *= DEMAND_DECAY
+        tracked = self.max_profiles * TRACKED_PROFILES_FACTOR
+        if len(self._demand) > tracked:
+            ranked = sorted(self._demand, key=self._demand.get, reverse=True)
+            for fingerprint in ranked[tracked:]:
+                del self._demand[fingerprint]
+                self._requests.pop(fingerprint, None)
+
+    def _expire(self, hot: List[str]):
+        now = time.monotonic()
+        for fingerprint in list(self._plans):
+            plans = self._plans[fingerprint]
+            if fingerprint not in hot:
+                self.expired += len(plans)
+                del self._plans[fingerprint]
+                continue
+            while plans and now - plans[0][0] > self.ttl_seconds:
+                plans.popleft()
+                self.expired += 1
+
+    def _budget_available(self) -> bool:
+        cutoff = time.monotonic() - 3600
+        while self._provider_calls and self._provider_calls[0] < cutoff:
+            self._provider_calls.popleft()
+        return len(self._provider_calls) < self.budget_per_hour
+
+    def _is_idle(self) -> bool:
+        return self.live_generations <= self.max_live_generations
+
+    async def refill(self, generate: Callable[[WorkoutPlanRequest], Awaitable[WorkoutPlan]]):
+        """Top up the pools of hot profiles while provider capacity is idle."""
+        hot = self.hot_profiles()
+        self._expire(hot)
+        for fingerprint in hot:
+            plans = self._plans.setdefault(fingerprint, deque())
+            while len(plans) < self.pool_size:
+                if not self._is_idle() or not self._budget_available():
+                    return
+                self._provider_calls.append(time.monotonic())
+                try:
+                    plan = await generate(self._requests[fingerprint])
+                except Exception as e:
+                    self.failures += 1
+                    logging.warning(f"Failed to pre-generate workout plan: {str(e)}")
+                    return
+                plans.append((time.monotonic(), plan))
+                self.pregenerated += 1
+
+    async def _run(self, generate: Callable[[WorkoutPlanRequest], Awaitable[WorkoutPlan]]):
+        while True:
+            await asyncio.sleep(self.refill_interval_seconds)
+            self._decay()
+            try:
+                await self.refill(generate)
+            except Exception as e:
+                logging.error(f"Workout plan pre-generation failed: {str(e)}")
+
+    def start(self, generate: Callable[[WorkoutPlanRequest], Awaitable[WorkoutPlan]]):
+        """Start the background refill task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(generate))
+
+    async def stop(self):
+        """Stop the background refill task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        """Report hit rate, pool occupancy and provider budget usage."""
+        served = self.hits + self.misses
+        self._budget_available()
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / served, 4) if served else 0.0,
+            "profiles_tracked": len(self._demand),
+            "profiles_pooled": len(self.hot_profiles()),
+            "pooled_plans": sum(len(plans) for plans in self._plans.values()),
+            "pool_size": self.pool_size,
+            "pregenerated": self.pregenerated,
+            "expired": self.expired,
+            "failures": self.failures,
+            "provider_calls_last_hour": len(self._provider_calls),
+            "budget_per_hour": self.budget_per_hour,
+        }
+
+# Shared pool used by the AI planner controller
+pregeneration_pool = PregenerationPool(
+    pool_size=settings.pregeneration_pool_size,
+    max_profiles=settings.pregeneration_max_profiles,
+    min_requests=settings.pregeneration_min_requests,
+    ttl_seconds=settings.pregeneration_ttl_seconds,
+    budget_per_hour=settings.pregeneration_budget_per_hour,
+    refill_interval_seconds=settings.pregeneration_refill_interval_seconds,
+    max_live_generations=settings.pregeneration_max_live_generations
+)
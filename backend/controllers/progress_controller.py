@@ -0,0 +1,31 @@
+from typing import Dict
+from models.progress import TrainingAggregates
+from Database import get_mongodb_controller
+
+def _non_zero(counts: Dict[str, int]) -> Dict[str, int]:
+    """Drop counters that were decremented back to zero by plan updates and deletes."""
+    return {key: value for key, value in (counts or {}).items() if value}
+
+class ProgressController:
+    @staticmethod
+    async def get_training_aggregates(user_id: str) -> TrainingAggregates:
+        """Get the materialized training aggregates for a user"""
+        db = await get_mongodb_controller()
+        aggregates = await db.get_training_aggregates(user_id)
+        if not aggregates:
+            return TrainingAggregates(user_id=user_id)
+
+        plan_count = aggregates.get("plan_count", 0)
+        total_sets = aggregates.get("total_sets", 0)
+        return TrainingAggregates(
+            user_id=user_id,
+            plan_count=plan_count,
+            total_workout_days=aggregates.get("total_workout_days", 0),
+            total_exercises=aggregates.get("total_exercises", 0),
+            total_sets=total_sets,
+            average_sets_per_plan=round(total_sets / plan_count, 1) if plan_count else 0.0,
+            muscle_groups=_non_zero(aggregates.get("muscle_groups")),
+            equipment=_non_zero(aggregates.get("equipment")),
+            difficulty=_non_zero(aggregates.get("difficulty")),
+            updated_at=aggregates.get("updated_at")
+        )
@@ -1,21 +1,54 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+from fastapi.middleware.gzip import GZipMiddleware
+import argparse
+import sys
+
+# brotli-asgi is in requirements.txt; responses fall back to gzip if it is missing
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 # Import routers
 from views.ai_planner_view import router as ai_planner_router
 from views.auth_router import router as auth_router
+from views.progress_view import router as progress_router
+from views.export_view import router as export_router
 
 # Import settings
 from config import settings
 
+# Import middleware
+from middleware.admission_control import AdmissionControlMiddleware, admission_budgets
+
+# Import controllers
+from controllers.ai_planner_controller import AIPlannerController
+from controllers.pregeneration_controller import pregeneration_pool
+
 # Create FastAPI app
 app = FastAPI(
     title="FLEX API",
-    description="FastAPI backend for FLEX application with LangChain integration",
+    description="FastAPI backend for FLEX application",
     version="1.0.0"
 )
 
+# Admission control, separate budgets for generation, read and auth routes
+if settings.admission_enabled:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        budgets=admission_budgets(settings),
+        jwt_secret=settings.jwt_secret,
+        jwt_algorithm=settings.jwt_algorithm,
+        anonymous_weight=settings.admission_anonymous_weight
+    )
+
+# Compress large responses, negotiating brotli or gzip with the client
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=settings.compression_minimum_size, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=settings.compression_minimum_size)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +61,18 @@ app.add_middleware(
 # Include routers
 app.include_router(ai_planner_router, prefix="/api", tags=["AI Planner"])
 app.include_router(auth_router, prefix="/api", tags=["Authentication"])
+app.include_router(progress_router, prefix="/api", tags=["Progress"])
+app.include_router(export_router, prefix="/api", tags=["Export"])
+
+# Background pre-generation of popular workout plans
+@app.on_event("startup")
+async def start_pregeneration():
+    if settings.pregeneration_enabled:
+        pregeneration_pool.start(AIPlannerController.create_workout_plan)
+
+@app.on_event("shutdown")
+async def stop_pregeneration():
+    await pregeneration_pool.stop()
 
 # Root endpoint
 @app.get("/")
@@ -36,4 +81,16 @@ async def root():
 
 # Run the application
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the FLEX API")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print import times and initialization steps of a cold start instead of serving")
+    parser.add_argument("--startup-budget-ms", type=float, default=None,
+                        help="Cold start budget for --profile-startup, exits with an error when exceeded")
+    args = parser.parse_args()
+    
+    if args.profile_startup:
+        from startup_profile import profile_startup
+        sys.exit(profile_startup(args.startup_budget_ms))
+    
+    import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
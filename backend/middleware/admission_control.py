@@ -0,0 +1,260 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from enum import Enum
+from typing import Deque, Dict, Tuple
+from fastapi.responses import JSONResponse
+
+# Token buckets kept per route class before idle ones are dropped
+MAX_TRACKED_CLIENTS = 10000
+
+class RouteClass(str, Enum):
+    """Route classes with separate admission budgets"""
+    GENERATION = "generation"
+    READ = "read"
+    AUTH = "auth"
+
+def classify_route(method: str, path: str) -> RouteClass:
+    """Map a request to the route class whose budget it is charged to."""
+    if path.startswith("/api/auth"):
+        return RouteClass.AUTH
+    if method == "POST" and path.rstrip("/") == "/api/ai-planner/generate":
+        return RouteClass.GENERATION
+    return RouteClass.READ
+
+class RouteBudget:
+    """Concurrency, rate and queueing limits of one route class."""
+    def __init__(
+        self,
+        max_concurrency: int,
+        per_user_concurrency: int,
+        rate_per_second: float,
+        burst: int,
+        max_queue: int,
+        queue_timeout_seconds: float
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_user_concurrency = per_user_concurrency
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted."""
+    def __init__(self, retry_after: float):
+        super().__init__("Too many requests")
+        self.retry_after = max(1, math.ceil(retry_after))
+
+class TokenBucket:
+    """Per-client request rate limiter."""
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate_per_second)
+        self.updated = now
+
+    def take(self) -> float:
+        """Take a token, returning 0 or the seconds until one becomes available."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate_per_second
+
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.burst
+
+class RouteLimiter:
+    """Admission control for one route class.
+
+    Requests over a client's rate are rejected immediately. Requests over the
+    concurrency limits wait in per-client queues; freed slots go to the waiting
+    client holding the fewest slots relative to its weight, so one busy client
+    cannot starve the others. Requests are shed once the queue is full or they
+    have waited longer than the queue timeout.
+    """
+    def __init__(self, budget: RouteBudget):
+        self.budget = budget
+        self.active = 0
+        self.queued = 0
+        self.shed = 0
+        self._active_per_client: Dict[str, int] = {}
+        self._weights: Dict[str, float] = {}
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= MAX_TRACKED_CLIENTS:
+                for idle in [key for key, value in self._buckets.items() if value.is_full()]:
+                    del self._buckets[idle]
+            bucket = self._buckets[client] = TokenBucket(self.budget.rate_per_second, self.budget.burst)
+        return bucket
+
+    def _has_capacity(self, client: str) -> bool:
+        return (
+            self.active < self.budget.max_concurrency
+            and self._active_per_client.get(client, 0) < self.budget.per_user_concurrency
+        )
+
+    def _admit(self, client: str):
+        self.active += 1
+        self._active_per_client[client] = self._active_per_client.get(client, 0) + 1
+
+    def _dispatch(self):
+        """Hand free slots to waiting clients, least served first."""
+        while self.active < self.budget.max_concurrency:
+            eligible = [client for client in self._waiters if self._has_capacity(client)]
+            if not eligible:
+                return
+            # min() keeps queue order among equally served clients
+            client = min(eligible, key=lambda key: self._active_per_client.get(key, 0) / self._weights.get(key, 1.0))
+            waiters = self._waiters[client]
+            future = waiters.popleft()
+            self.queued -= 1
+            if not waiters:
+                del self._waiters[client]
+            else:
+                # Rotate the client behind the others for the next free slot
+                self._waiters.move_to_end(client)
+            if future.done():
+                continue
+            self._admit(client)
+            future.set_result(None)
+
+    def _remove_waiter(self, client: str, future: asyncio.Future):
+        waiters = self._waiters.get(client)
+        if waiters and future in waiters:
+            waiters.remove(future)
+            self.queued -= 1
+            if not waiters:
+                del self._waiters[client]
+
+    def _reject(self, retry_after: float):
+        self.shed += 1
+        raise AdmissionRejected(retry_after)
+
+    async def acquire(self, client: str, weight: float = 1.0):
+        """Wait for a slot, raising AdmissionRejected if the request is shed."""
+        retry_after = self._bucket(client).take()
+        if retry_after:
+            self._reject(retry_after)
+
+        if not self._waiters and self._has_capacity(client):
+            self._admit(client)
+            return
+        if self.queued >= self.budget.max_queue:
+            self._reject(self.budget.queue_timeout_seconds)
+
+        future = asyncio.get_running_loop().create_future()
+        self._weights[client] = weight
+        self._waiters.setdefault(client, deque()).append(future)
+        self.queued += 1
+        self._dispatch()
+        try:
+            await asyncio.wait_for(future, self.budget.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            self._remove_waiter(client, future)
+            self._reject(self.budget.queue_timeout_seconds)
+        except asyncio.CancelledError:
+            # The client went away; give back a slot granted in the meantime
+            if future.done() and not future.cancelled():
+                self.release(client)
+            else:
+                self._remove_waiter(client, future)
+            raise
+
+    def release(self, client: str):
+        """Free a slot and admit the next waiting request."""
+        self.active -= 1
+        remaining = self._active_per_client.get(client, 0) - 1
+        if remaining > 0:
+            self._active_per_client[client] = remaining
+        else:
+            self._active_per_client.pop(client, None)
+            if client not in self._waiters:
+                self._weights.pop(client, None)
+        self._dispatch()
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying per-route-class, per-client admission control.
+
+    Clients are identified by the subject of a valid bearer token, falling
+    back to the remote address with ``anonymous_weight`` as fair-share weight.
+    Shed requests are answered with 429 and a Retry-After header.
+    """
+    def __init__(
+        self,
+        app,
+        budgets: Dict[RouteClass, RouteBudget],
+        jwt_secret: str,
+        jwt_algorithm: str,
+        anonymous_weight: float = 1.0
+    ):
+        self.app = app
+        self.limiters = {route_class: RouteLimiter(budget) for route_class, budget in budgets.items()}
+        self.jwt_secret = jwt_secret
+        self.jwt_algorithm = jwt_algorithm
+        self.anonymous_weight = anonymous_weight
+
+    def _identify(self, scope) -> Tuple[str, float]:
+        from jose import JWTError, jwt
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    try:
+                        payload = jwt.decode(token, self.jwt_secret, algorithms=[self.jwt_algorithm])
+                    except JWTError:
+                        break
+                    if payload.get("sub"):
+                        return f"user:{payload['sub']}", 1.0
+                break
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}", self.anonymous_weight
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[classify_route(scope["method"], scope["path"])]
+        client, weight = self._identify(scope)
+        try:
+            await limiter.acquire(client, weight)
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                {"detail": "Too many requests, please retry later"},
+                status_code=429,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(client)
+
+def admission_budgets(settings) -> Dict[RouteClass, RouteBudget]:
+    """Build the route class budgets from the application settings."""
+    return {
+        route_class: RouteBudget(
+            max_concurrency=getattr(settings, f"admission_{route_class.value}_max_concurrency"),
+            per_user_concurrency=getattr(settings, f"admission_{route_class.value}_per_user_concurrency"),
+            rate_per_second=getattr(settings, f"admission_{route_class.value}_rate_per_second"),
+            burst=getattr(settings, f"admission_{route_class.value}_burst"),
+            max_queue=getattr(settings, f"admission_{route_class.value}_max_queue"),
+            queue_timeout_seconds=getattr(settings, f"admission_{route_class.value}_queue_timeout_seconds"),
+        )
+        for route_class in RouteClass
+    }
@@ -0,0 +1,41 @@
+"""Move exercises embedded in stored workout plans to the shared exercises collection.
+
+Prints the collection sizes before and after so the storage reduction can be
+measured. The data size drops right away, the on-disk storage size only once
+MongoDB reuses or compacts the freed space:
+
+    python migrate_exercises.py          # migrate and report
+    python migrate_exercises.py --stats  # only report current sizes
+"""
+import argparse
+import asyncio
+
+from config import settings
+from Database import initialize_mongodb
+
+def print_stats(label, stats):
+    print(label)
+    for name in ("workout_plans", "exercises"):
+        collection = stats[name]
+        print(
+            f"  {name:<14} {collection['count']:>8} docs  "
+            f"{collection['size']:>12} bytes  "
+            f"avg {collection['avg_obj_size']:>8} bytes  "
+            f"storage {collection['storage_size']:>12} bytes  "
+            f"indexes {collection['total_index_size']:>12} bytes"
+        )
+
+async def migrate(stats_only=False):
+    db = await initialize_mongodb(settings.mongodb_url, settings.mongodb_db_name)
+    print_stats("Before" if not stats_only else "Current", await db.get_storage_stats())
+    if stats_only:
+        return
+    migrated = await db.migrate_embedded_exercises()
+    print(f"Migrated {migrated} workout plans")
+    print_stats("After", await db.get_storage_stats())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normalize exercises embedded in stored workout plans")
+    parser.add_argument("--stats", action="store_true", help="Only report collection sizes")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.stats))
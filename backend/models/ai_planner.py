@@ -50,4 +50,50 @@ class WorkoutPlan(BaseModel):
 class WorkoutPlanResponse(BaseModel):
     """Model for workout plan response"""
     plan: WorkoutPlan
-    message: Optional[str] = None
\ No newline at end of file
+    message: Optional[str] = None
+
+class PlanSearchHit(BaseModel):
+    """Summary of a workout plan matching a search"""
+    id: str
+    title: str
+    description: str
+    fitness_level: str
+    goals: List[str]
+    created_at: Optional[datetime] = None
+    workout_day_count: int = 0
+    score: Optional[float] = None  # Text relevance, only set for text searches
+
+class FacetCount(BaseModel):
+    """Number of matching plans containing a facet value"""
+    value: str
+    count: int
+
+class PlanSearchFacets(BaseModel):
+    """Facet counts for a workout plan search"""
+    muscle_groups: List[FacetCount] = []
+    equipment: List[FacetCount] = []
+    difficulty: List[FacetCount] = []
+
+class PlanSearchResponse(BaseModel):
+    """Model for workout plan search response"""
+    hits: List[PlanSearchHit]
+    total: int
+    page: int
+    page_size: int
+    facets: PlanSearchFacets
+
+class PregenerationStats(BaseModel):
+    """Model for workout plan pre-generation pool statistics"""
+    enabled: bool
+    hits: int
+    misses: int
+    hit_rate: float
+    profiles_tracked: int
+    profiles_pooled: int
+    pooled_plans: int
+    pool_size: int
+    pregenerated: int
+    expired: int
+    failures: int
+    provider_calls_last_hour: int
+    budget_per_hour: int
\ No newline at end of file
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class ExportFormat(str, Enum):
+    """Supported account data export formats"""
+    NDJSON = "ndjson"  # One JSON document per line
+    CSV = "csv"  # One row per exercise or schedule item
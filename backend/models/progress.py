@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+from datetime import datetime
+
+class TrainingAggregates(BaseModel):
+    """Model for a user's training aggregates across all of their workout plans"""
+    user_id: str
+    plan_count: int = 0
+    total_workout_days: int = 0
+    total_exercises: int = 0
+    total_sets: int = 0
+    average_sets_per_plan: float = 0.0  # Total sets divided by the number of plans
+    muscle_groups: Dict[str, int] = Field(default_factory=dict)  # Sets per muscle group
+    equipment: Dict[str, int] = Field(default_factory=dict)  # Exercises per piece of equipment
+    difficulty: Dict[str, int] = Field(default_factory=dict)  # Exercises per difficulty level
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,29 @@
+"""Rebuild materialized training aggregates from stored workout plans.
+
+Used to backfill aggregates for existing plans and to repair drift:
+
+    python rebuild_aggregates.py              # all users
+    python rebuild_aggregates.py --user NAME  # a single user
+"""
+import argparse
+import asyncio
+import logging
+
+from config import settings
+from Database import initialize_mongodb
+
+async def rebuild(user_id=None):
+    db = await initialize_mongodb(settings.mongodb_url, settings.mongodb_db_name)
+    if user_id:
+        await db.rebuild_training_aggregates(user_id)
+        logging.info(f"Rebuilt training aggregates for {user_id}")
+    else:
+        rebuilt = await db.rebuild_all_training_aggregates()
+        logging.info(f"Rebuilt training aggregates for {rebuilt} users")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild training aggregates from stored workout plans")
+    parser.add_argument("--user", help="Only rebuild aggregates for this user")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(rebuild(args.user))
@@ -0,0 +1,83 @@
+"""Cold start profile of the FLEX API.
+
+Imports the application in a fresh interpreter with ``-X importtime`` and
+reports the import time of each top-level package together with the time spent in each
+initialization step. Run it through ``python main.py --profile-startup``.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Cold start target in milliseconds, from interpreter launch to a ready app
+DEFAULT_STARTUP_BUDGET_MS = 2000.0
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in the child interpreter, timing each initialization step
+PROFILE_SCRIPT = """
+import json
+import time
+
+steps = []
+
+def step(name, fn):
+    start = time.perf_counter()
+    result = fn()
+    steps.append({"name": name, "ms": (time.perf_counter() - start) * 1000})
+    return result
+
+step("load settings", lambda: __import__("config"))
+main = step("import application", lambda: __import__("main"))
+step("build middleware stack", main.app.build_middleware_stack)
+print(json.dumps(steps))
+"""
+
+def parse_import_times(stderr: str) -> List[Dict[str, object]]:
+    """Parse ``-X importtime`` output into the time spent importing each top-level package."""
+    packages: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    return [{"module": package, "ms": self_us / 1000} for package, self_us in packages.items()]
+
+def profile_startup(budget_ms: Optional[float] = None, top: int = 15) -> int:
+    """Print the startup profile and return a non-zero exit code if it exceeds the budget."""
+    budget_ms = DEFAULT_STARTUP_BUDGET_MS if budget_ms is None else budget_ms
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROFILE_SCRIPT],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    total_ms = (time.perf_counter() - start) * 1000
+
+    if result.returncode != 0:
+        print("Application failed to start:", file=sys.stderr)
+        print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "no output", file=sys.stderr)
+        return result.returncode
+
+    steps = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = sorted(parse_import_times(result.stderr), key=lambda entry: entry["ms"], reverse=True)
+
+    print(f"Slowest imports by top-level package (top {top})")
+    for entry in imports[:top]:
+        print(f"  {entry['ms']:9.1f} ms  {entry['module']}")
+    print()
+    print("Initialization steps")
+    for entry in steps:
+        print(f"  {entry['ms']:9.1f} ms  {entry['name']}")
+    print()
+    print(f"Cold start: {total_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+
+    if total_ms > budget_ms:
+        print("Cold start exceeds the budget", file=sys.stderr)
+        return 1
+    return 0
@@ -1,11 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from models.ai_planner import WorkoutPlanRequest, WorkoutPlan, WorkoutPlanResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from models.ai_planner import WorkoutPlanRequest, WorkoutPlan, WorkoutPlanResponse, PlanSearchResponse, PregenerationStats
 from controllers.ai_planner_controller import AIPlannerController
+from controllers.pregeneration_controller import pregeneration_pool
 from views.auth_view import oauth2_scheme, AuthController
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/ai-planner", tags=["AI Planner"])
 
+# Clients may cache plan responses but must revalidate them with If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+def _opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check whether an If-None-Match header matches the current ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    etag = _opaque_tag(etag)
+    for candidate in if_none_match.split(","):
+        candidate = _opaque_tag(candidate.strip())
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
+
 @router.post("/generate", response_model=WorkoutPlanResponse)
 async def generate_workout_plan(request: WorkoutPlanRequest, token: str = Depends(oauth2_scheme)):
     """Generate a workout plan using AI"""
@@ -16,6 +40,8 @@ async def generate_workout_plan(request: WorkoutPlanRequest, token: str = Depend
         # Generate workout plan
         workout_plan = await AIPlannerController.generate_workout_plan(request, user.username)
         
+        # Model instances pass response_model validation without being rebuilt,
+        # and FastAPI serializes them straight to JSON bytes with Pydantic
         return WorkoutPlanResponse(
             plan=workout_plan,
             message="Workout plan generated successfully"
@@ -26,16 +52,29 @@ async def generate_workout_plan(request: WorkoutPlanRequest, token: str = Depend
             detail=f"Error generating workout plan: {str(e)}"
         )
 
+@router.get("/pregeneration/stats", response_model=PregenerationStats)
+async def get_pregeneration_stats(token: str = Depends(oauth2_scheme)):
+    """Get hit rate, pool size and provider budget usage of plan pre-generation (admins only)"""
+    await AuthController.get_current_admin_user(token)
+    return pregeneration_pool.stats()
+
 @router.get("/plans", response_model=List[WorkoutPlan])
-async def get_user_workout_plans(token: str = Depends(oauth2_scheme)):
+async def get_user_workout_plans(request: Request, response: Response, token: str = Depends(oauth2_scheme)):
     """Get all workout plans for the current user"""
     try:
         # Get current user
         user = await AuthController.get_current_user(token)
         
+        # Answer unchanged polls from the collection version alone
+        etag = await AIPlannerController.get_user_workout_plans_etag(user.username)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        
         # Get user's workout plans
         workout_plans = await AIPlannerController.get_user_workout_plans(user.username)
         
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
         return workout_plans
     except Exception as e:
         raise HTTPException(
@@ -43,29 +82,76 @@ async def get_user_workout_plans(token: str = Depends(oauth2_scheme)):
             detail=f"Error retrieving workout plans: {str(e)}"
         )
 
+@router.get("/plans/search", response_model=PlanSearchResponse)
+async def search_workout_plans(
+    q: Optional[str] = Query(None, description="Text to search for in plan titles and descriptions"),
+    muscle_group: Optional[List[str]] = Query(None, description="Only plans training any of these muscle groups"),
+    equipment: Optional[List[str]] = Query(None, description="Only plans using any of this equipment"),
+    difficulty: Optional[List[str]] = Query(None, description="Only plans with exercises of any of these difficulties"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    token: str = Depends(oauth2_scheme)
+):
+    """Search the current user's workout plans with facet counts"""
+    try:
+        # Get current user
+        user = await AuthController.get_current_user(token)
+        
+        return await AIPlannerController.search_workout_plans(
+            user.username,
+            query=q,
+            muscle_groups=muscle_group,
+            equipment=equipment,
+            difficulty=difficulty,
+            page=page,
+            page_size=page_size
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error searching workout plans: {str(e)}"
+        )
+
 @router.get("/plans/{plan_id}", response_model=WorkoutPlan)
-async def get_workout_plan(plan_id: str, token: str = Depends(oauth2_scheme)):
+async def get_workout_plan(plan_id: str, request: Request, response: Response, token: str = Depends(oauth2_scheme)):
     """Get a specific workout plan by ID"""
     try:
         # Get current user
         user = await AuthController.get_current_user(token)
         
-        # Get workout plan
-        workout_plan = await AIPlannerController.get_workout_plan(plan_id)
+        # Get the owner and version only, the full plan is loaded if it changed
+        plan_etag = await AIPlannerController.get_workout_plan_etag(plan_id)
         
-        if not workout_plan:
+        if not plan_etag:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Workout plan not found"
             )
         
         # Check if the workout plan belongs to the user
-        if workout_plan.user_id != user.username:
+        if plan_etag["user_id"] != user.username:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have permission to access this workout plan"
             )
         
+        etag = plan_etag["etag"]
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        
+        # Get workout plan
+        workout_plan = await AIPlannerController.get_workout_plan(plan_id)
+        
+        if not workout_plan:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Workout plan not found"
+            )
+        
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
         return workout_plan
     except HTTPException as e:
         raise e
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import JWTError, jwt
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime, timedelta
@@ -77,6 +76,7 @@ class AuthController:
         else:
             expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         to_encode.update({"exp": expire})
+        from jose import jwt
         encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
         return encoded_jwt
 
@@ -87,6 +87,8 @@ class AuthController:
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+        # python-jose is imported on first use to keep startup fast
+        from jose import JWTError, jwt
         try:
             payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
             username: str = payload.get("sub")
@@ -100,6 +102,17 @@ class AuthController:
             raise credentials_exception
         return user
 
+    @staticmethod
+    async def get_current_admin_user(token: str = Depends(oauth2_scheme)):
+        """Get the current user, requiring them to be listed in ADMIN_USERNAMES"""
+        user = await AuthController.get_current_user(token)
+        if user.username not in settings.admin_usernames:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admin access required",
+            )
+        return user
+
     @staticmethod
     async def get_current_active_user(current_user: User = Depends(get_current_user)):
         if current_user.disabled:
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from controllers.export_controller import ExportController
+from models.export import ExportFormat
+from views.auth_view import oauth2_scheme, AuthController
+from datetime import datetime
+from typing import Optional
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+@router.get("")
+async def export_user_data(
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="Export format"),
+    updated_since: Optional[datetime] = Query(None, description="Only export records created or updated since this time"),
+    token: str = Depends(oauth2_scheme)
+):
+    """Stream all workout plans and daily schedules of the current user"""
+    # Authenticate and open the cursors before streaming starts, errors can't be
+    # reported once the status and headers have been sent
+    user = await AuthController.get_current_user(token)
+    try:
+        records = await ExportController.open_export(user.username, updated_since)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error exporting user data: {str(e)}"
+        )
+    
+    if format == ExportFormat.CSV:
+        content = ExportController.stream_csv(records)
+    else:
+        content = ExportController.stream_ndjson(records)
+    
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="flex-export.{format.value}"'}
+    )
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from models.progress import TrainingAggregates
+from controllers.progress_controller import ProgressController
+from views.auth_view import oauth2_scheme, AuthController
+
+router = APIRouter(prefix="/progress", tags=["Progress"])
+
+@router.get("/training-aggregates", response_model=TrainingAggregates)
+async def get_training_aggregates(token: str = Depends(oauth2_scheme)):
+    """Get weekly volume, muscle group and equipment aggregates for the current user"""
+    try:
+        # Get current user
+        user = await AuthController.get_current_user(token)
+        
+        return await ProgressController.get_training_aggregates(user.username)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving training aggregates: {str(e)}"
+        )